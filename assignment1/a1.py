@@ -2,14 +2,84 @@
 # Implement the specified commands to complete the assignment
 # Full assignment specification on Canvas
 
+import os
 import sys
 import random
-from typing import List, Tuple, Optional, Set
+import re
+from typing import List, Tuple, Optional
 
 class CommandInterface:
     # The following is already defined and does not need modification
     # However, you may change or add to this code as you see fit, e.g. adding class variables to init
 
+    # "play|legal <col> <row>" with non-negative coordinates, matched against the
+    # stripped command line. Anything else goes through the generic split path.
+    _MOVE_RE = re.compile(r'(play|legal)\s+(\d+)\s+(\d+)\Z', re.I)
+    # Board digit -> text for show: empty, player 1, player 2, end of row
+    _SHOW_TABLE = str.maketrans({'0': '_ ', '1': '1 ', '2': '2 ', '3': '\n'})
+
+    # Source for _update_scores(bit, p), specialized per board by
+    # _compile_update_scores: adds the effect of p's new stone at bit to the
+    # running scores. A line scores 2^(L-1) for L>=2 and a stone not in any
+    # such line scores 1. A new stone only joins runs of its own colour in
+    # the lines through it, so only those runs are walked.
+    _UPDATE_HEAD = """\
+def _update_scores(self, bit, p):
+    b = self.bb[p]
+    m = 1 << bit
+    if not b & self.neighbours[bit]:
+        # Touches no stone of its own colour: a new singleton
+        if p == 1:
+            self.s1 += 1
+        else:
+            self.s2 += 1
+        return
+    delta = 0
+    joined = 0  # cells of any long line through the new stone
+"""
+    # One direction s: skip it unless the stone has a same-colour neighbour
+    # along s, else walk the run lengths before (a) and after (c) the stone.
+    _UPDATE_DIR = """\
+    nb = b & ((m >> {s}) | (m << {s}))
+    if nb:
+        joined |= m | nb
+        a = 0
+        k = m >> {s}
+        while b & k:
+            a += 1
+            k >>= {s}
+        c = 0
+        k = m << {s}
+        while b & k:
+            c += 1
+            k <<= {s}
+        delta += 1 << (a + c)
+        if a >= 2:
+            delta -= 1 << (a - 1)
+        if c >= 2:
+            delta -= 1 << (c - 1)
+"""
+    # Former singletons that now sit in a long line lose their +1. The stone
+    # itself has a neighbour here, so it always joins a line.
+    _UPDATE_TAIL = """\
+    delta -= (joined & ~self.long_mask & ~m).bit_count()
+    self.long_mask |= joined
+    if p == 1:
+        self.s1 += delta
+    else:
+        self.s2 += delta
+"""
+
+    # Fixed attribute layout: no per-instance __dict__, and the hot paths'
+    # self.<attr> loads become slot descriptor reads
+    __slots__ = (
+        "command_dict", "move_dict",
+        "cols", "rows", "cutoff", "handicap",
+        "stride", "full_mask", "bb", "occ", "dirs", "neighbours", "row_ends",
+        "s1", "s2", "long_mask", "_score_stack", "_update_scores",
+        "current", "history", "ended",
+    )
+
     def __init__(self):
         # Define the string to function command mapping
         self.command_dict = {
@@ -23,25 +93,59 @@ class CommandInterface:
             "winner": self.winner,
             "show": self.show,
         }
+        # Handlers for pre-parsed (c, r) moves, keyed by lowercased command
+        self.move_dict = {
+            "legal": self._legal_fast,
+            "play": self._play_fast,
+        }
         # Game state (initialized by init_game)
         self.cols: int = 0
         self.rows: int = 0
-        self.cutoff: float = 0.0
-        self.handicap: float = 0.0
-        self.board: List[List[int]] = []           # board[row][col] in {0,1,2}
+        # Kept as int when integral, so scores stay in int arithmetic
+        self.cutoff: float = 0
+        self.handicap: float = 0
+        # Bitboards: bit (r * stride + c) of bb[p] is set iff player p owns (c, r).
+        # stride = cols + 1 leaves an always-empty sentinel column so that shifted
+        # runs never wrap from the end of one row into the start of the next.
+        self.stride: int = 1
+        self.full_mask: int = 0                    # every on-board bit set
+        self.bb: List[int] = [0, 0, 0]             # indexed by player (bb[0] unused)
+        self.occ: int = 0                          # bb[1] | bb[2]
+        self.dirs: Tuple[int, ...] = ()            # bit shifts for E, S, SE, NE lines
+        self.neighbours: List[int] = []            # per bit: mask of its on-board neighbours
+        self.row_ends: int = 0                     # decimal digit 3 at each sentinel bit (for show)
+        # Scores are kept up to date move by move rather than rescanned
+        self.s1: int = 0                           # player 1 score (no handicap)
+        self.s2: int = 0                           # player 2 score (no handicap)
+        self.long_mask: int = 0                    # stones in any L>=2 line
+        self._score_stack: List[Tuple[int, int, int]] = []  # (s1, s2, long_mask) before each move
         self.current: int = 1                      # 1 or 2
         self.history: List[Tuple[int, int, int]] = []  # (c, r, player)
         self.ended: bool = False
+        self._compile_update_scores()
         
     # Convert a raw string to a command and a list of arguments
-    def process_command(self, string: str) -> bool:
+    # parts may be passed in when the caller has already split the line
+    def process_command(self, string: str, parts: Optional[List[str]] = None) -> bool:
         string = string.strip()
         if not string:
             print("= -1\n")
             return False
 
+        # Fast path for the common move commands: parse both ints in one match
+        m = self._MOVE_RE.match(string)
+        if m is not None:
+            try:
+                return self.move_dict[m.group(1).lower()](int(m.group(2)), int(m.group(3)))
+            except Exception as e:
+                print(f"Command '{string}' failed with exception:", file=sys.stderr)
+                print(e, file=sys.stderr)
+                print("= -1\n")
+                return False
+
         # Split safely (command plus args). Be forgiving about extra spaces.
-        parts = string.split()
+        if parts is None:
+            parts = string.split()
         command = parts[0].lower()
         args = parts[1:]
 
@@ -62,18 +166,24 @@ class CommandInterface:
     # Commands should return True on success, and False on failure
     # Commands will automatically print '= 1' at the end of execution on success
     def main_loop(self):
-        while True:
-            line = input()
-            if not line:
+        write = sys.stdout.write
+        flush = sys.stdout.flush
+        proc = self.process_command
+        for line in sys.stdin:
+            parts = line.split()
+            if not parts:
                 # treat empty line as failure
-                print("= -1\n")
-                continue
-            if line.split()[0].lower() == "exit":
-                print("= 1\n")
+                write("= -1\n\n")
+            elif parts[0].lower() == "exit":
+                write("= 1\n\n")
+                flush()
                 return True
-            if self.process_command(line):
+            elif proc(line, parts):
                 # Success status line is printed here
-                print("= 1\n")
+                write("= 1\n\n")
+            # input() used to flush stdout before each read; keep the
+            # response visible to an interactive driver before blocking
+            flush()
 
     # List available commands
     def help(self, args: List[str]) -> bool:
@@ -118,11 +228,36 @@ class CommandInterface:
 
         self.cols = w
         self.rows = h
-        self.handicap = p
-        self.cutoff = s
-        self.board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        # Whole numbers (within the range where int and float agree exactly)
+        # are stored as int; the scores, comparisons and output then never
+        # touch floats.
+        self.handicap = int(p) if p.is_integer() and abs(p) < 2**50 else p
+        self.cutoff = int(s) if s.is_integer() and s < 2**50 else s
+        self.stride = self.cols + 1
+        self.full_mask = sum(((1 << self.cols) - 1) << (r * self.stride) for r in range(self.rows))
+        self.bb = [0, 0, 0]
+        self.occ = 0
+        # E, S, SE and NE (walked as SW) successors; the sentinel column keeps
+        # every shift from wrapping, so no per-direction edge masks are needed.
+        # Lines that cannot hold two stones on this board are left out.
+        self.dirs = tuple(d for d, ok in ((1, w > 1),
+                                          (self.stride, h > 1),
+                                          (self.stride + 1, w > 1 and h > 1),
+                                          (self.stride - 1, w > 1 and h > 1)) if ok)
+        self.neighbours = [0] * (self.rows * self.stride)
+        for bit in range(len(self.neighbours)):
+            m = 1 << bit
+            for d in self.dirs:
+                self.neighbours[bit] |= (m >> d) | (m << d)
+            self.neighbours[bit] &= self.full_mask
+        self.row_ends = int(("0" * self.cols + "3") * self.rows)
+        self._compile_update_scores()
         self.current = 1
         self.history.clear()
+        self.s1 = 0
+        self.s2 = 0
+        self.long_mask = 0
+        self._score_stack.clear()
         self.ended = False
         return True
 
@@ -140,7 +275,9 @@ class CommandInterface:
         except ValueError:
             print("= -1\n")
             return False
+        return self._legal_fast(c, r)
 
+    def _legal_fast(self, c: int, r: int) -> bool:
         print("yes" if self._is_legal(c, r) else "no")
         return True
 
@@ -158,17 +295,19 @@ class CommandInterface:
         except ValueError:
             print("= -1\n")
             return False
+        return self._play_fast(c, r)
 
+    def _play_fast(self, c: int, r: int) -> bool:
         if not self._is_legal(c, r):
             print("= -1\n")
             return False
 
         # Apply move
-        self.board[r][c] = self.current
+        self._place(c, r, self.current)
         self.history.append((c, r, self.current))
 
         # Check end conditions
-        p1, p2 = self._compute_scores()
+        p1, p2 = self._scores()
         if self._game_should_end_after_move(p1, p2):
             self.ended = True
         else:
@@ -180,21 +319,23 @@ class CommandInterface:
             >> genmove
             Generates and plays a random valid move.
         '''
-        moves = [(c, r)
-                 for r in range(self.rows)
-                 for c in range(self.cols)
-                 if self._is_legal(c, r)]
-        if not moves:
+        # Legal moves are exactly the empty on-board bits (none once ended)
+        empties = 0 if self.ended else ~self.occ & self.full_mask
+        n = empties.bit_count()
+        if n == 0:
             print("resign")
             return True  # success status with "resign" text
-        c, r = random.choice(moves)
+        # Pick the k-th set bit uniformly by clearing the k lowest ones
+        for _ in range(random.randrange(n)):
+            empties &= empties - 1
+        r, c = divmod((empties & -empties).bit_length() - 1, self.stride)
 
         # play it (same as play, but we already know it's legal)
-        self.board[r][c] = self.current
+        self._place(c, r, self.current)
         self.history.append((c, r, self.current))
         print(f"{c} {r}")
 
-        p1, p2 = self._compute_scores()
+        p1, p2 = self._scores()
         if self._game_should_end_after_move(p1, p2):
             self.ended = True
         else:
@@ -214,7 +355,7 @@ class CommandInterface:
             print("= -1\n")
             return False
         c, r, player = self.history.pop()
-        self.board[r][c] = 0
+        self._remove(c, r, player)
         self.current = player
         self.ended = False
         return True
@@ -224,8 +365,10 @@ class CommandInterface:
             >> score
             Prints the scores.
         '''
-        p1, p2 = self._compute_scores()
+        p1, p2 = self._scores()
         def fmt(x: float) -> str:
+            if type(x) is int:
+                return str(x)
             xi = int(round(x))
             return str(xi) if abs(x - xi) < 1e-9 else str(x)
         print(f"{fmt(p1)} {fmt(p2)}")
@@ -236,7 +379,11 @@ class CommandInterface:
             >> winner
             Prints the winner information.
         '''
-        p1, p2 = self._compute_scores()
+        # Without a cutoff nothing is decided until the board fills up
+        if self.cutoff == 0.0 and not self._board_full():
+            print("unknown")
+            return True
+        p1, p2 = self._scores()
         w = self._winner_from_scores(p1, p2)
         print(w)
         return True
@@ -246,86 +393,60 @@ class CommandInterface:
             >> show
             Shows the game board.
         '''
-        trail = " "
-        for r in range(self.rows):
-            row_syms = []
-            for c in range(self.cols):
-                v = self.board[r][c]
-                row_syms.append('_' if v == 0 else str(v))
-            print(' '.join(row_syms) + trail)
+        if not self.rows:
+            return True
+        # Read each bitboard (bit 0 first) as a decimal number of 0/1 digits.
+        # Stones never overlap and the sentinel column is always empty, so
+        # bb1 + 2*bb2 + 3*<sentinels> has no carries and spells the board
+        # as one digit per bit; a single translate then renders it.
+        n = self.rows * self.stride
+        width = f"0{n}b"
+        digits = (int(format(self.bb[1], width)[::-1])
+                  + 2 * int(format(self.bb[2], width)[::-1])
+                  + self.row_ends)
+        sys.stdout.write(str(digits).zfill(n).translate(self._SHOW_TABLE))
         return True
 
-    def _in_bounds(self, c: int, r: int) -> bool:
-        return 0 <= c < self.cols and 0 <= r < self.rows
+    def _place(self, c: int, r: int, player: int) -> None:
+        bit = r * self.stride + c
+        self._score_stack.append((self.s1, self.s2, self.long_mask))
+        self.bb[player] |= 1 << bit
+        self.occ |= 1 << bit
+        self._update_scores(bit, player)
+
+    def _remove(self, c: int, r: int, player: int) -> None:
+        m = ~(1 << (r * self.stride + c))
+        self.bb[player] &= m
+        self.occ &= m
+        self.s1, self.s2, self.long_mask = self._score_stack.pop()
 
     def _is_legal(self, c: int, r: int) -> bool:
-        return (not self.ended) and self._in_bounds(c, r) and self.board[r][c] == 0
-
-    def _compute_scores(self) -> Tuple[float, float]:
-        """Compute scores from maximal lines in 4 directions, then +1 for stones
-        not in any length>=2 line; add handicap to player 2."""
-        s1 = 0
-        s2 = 0
-
-        # Track cells that belong to any L>=2 line (for either player)
-        in_long_line: Set[Tuple[int, int]] = set()
-
-        # Directions: E, S, SE, NE
-        dirs = [(1, 0), (0, 1), (1, 1), (1, -1)]
-
-        # Count maximal runs with L >= 2
-        for r in range(self.rows):
-            for c in range(self.cols):
-                p = self.board[r][c]
-                if p == 0:
-                    continue
-                for dc, dr in dirs:
-                    pc, pr = c - dc, r - dr
-                    # Only start counting if (c,r) is the start of a run in this direction
-                    if self._in_bounds(pc, pr) and self.board[pr][pc] == p:
-                        continue
-                    # Walk forward
-                    cc, rr = c, r
-                    length = 0
-                    while self._in_bounds(cc, rr) and self.board[rr][cc] == p:
-                        length += 1
-                        cc += dc
-                        rr += dr
-                    if length >= 2:
-                        val = 1 << (length - 1)  # 2^(L-1)
-                        if p == 1:
-                            s1 += val
-                        else:
-                            s2 += val
-                        # Mark every cell in this long line segment
-                        cc2, rr2 = c, r
-                        for _ in range(length):
-                            in_long_line.add((cc2, rr2))
-                            cc2 += dc
-                            rr2 += dr
-
-        # Now count singletons (+1) for stones not in any long line
-        for r in range(self.rows):
-            for c in range(self.cols):
-                p = self.board[r][c]
-                if p == 0:
-                    continue
-                if (c, r) not in in_long_line:
-                    if p == 1:
-                        s1 += 1
-                    else:
-                        s2 += 1
-
-        # Apply handicap to player 2
-        s2 += self.handicap
-        return float(s1), float(s2)
+        # Bounds are checked inline: this runs for every play and legal command
+        return (not self.ended and 0 <= c < self.cols and 0 <= r < self.rows
+                and not (self.occ >> (r * self.stride + c)) & 1)
+
+    def _scores(self) -> Tuple[float, float]:
+        """Current scores, with the handicap added to player 2.
+
+        Both are ints unless the handicap is fractional.
+        """
+        return self.s1, self.s2 + self.handicap
+
+    def _compile_update_scores(self) -> None:
+        """Generate _update_scores for the current board geometry.
+
+        The per-direction loop is unrolled with each shift baked in as a
+        literal, so an update does no tuple iteration or attribute loads for
+        the directions.
+        """
+        src = self._UPDATE_HEAD + "".join(
+            self._UPDATE_DIR.format(s=s) for s in self.dirs) + self._UPDATE_TAIL
+        ns = {}
+        exec(compile(src, f"<_update_scores {self.cols}x{self.rows}>", "exec"), ns)
+        self._update_scores = ns["_update_scores"].__get__(self)
 
     def _board_full(self) -> bool:
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if self.board[r][c] == 0:
-                    return False
-        return True
+        return self.occ == self.full_mask
 
     def _game_should_end_after_move(self, s1: float, s2: float) -> bool:
         # cutoff == 0 → no winner until board is full
@@ -363,5 +484,9 @@ class CommandInterface:
     #======================================================================================
 
 if __name__ == "__main__":
+    # Block-buffer stdout (even under -u or on a terminal): a command's output
+    # and its status line go out together on main_loop's flush after each
+    # command, instead of one write per print.
+    sys.stdout = os.fdopen(1, "w", buffering=1 << 16, closefd=False)
     interface = CommandInterface()
     interface.main_loop()